@@ -1641,7 +1641,9 @@ def generate_html(json_path, output_dir, github_repo=None):
 
 
 @click.group(cls=DefaultGroup, default="local", default_if_no_args=True)
-@click.version_option(None, "-v", "--version", package_name="claude-code-transcripts-extended")
+@click.version_option(
+    None, "-v", "--version", package_name="claude-code-transcripts-extended"
+)
 def cli():
     """Convert Claude Code session JSON to mobile-friendly HTML pages."""
     pass
@@ -2352,6 +2354,24 @@ def all_cmd(source, output, include_agents, dry_run, open_browser, quiet):
     default=None,
     help="Maximum number of sessions to analyze.",
 )
+@click.option(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="Worker processes for parsing sessions (default: 1).",
+)
+@click.option(
+    "--concurrency",
+    type=int,
+    default=8,
+    help="Analysis API calls in flight at once (default: 8).",
+)
+@click.option(
+    "--batch-api",
+    is_flag=True,
+    help="Analyze via the Message Batches API (half cost, higher latency).",
+)
 @click.option(
     "--extract-only",
     is_flag=True,
@@ -2378,45 +2398,62 @@ def all_cmd(source, output, include_agents, dry_run, open_browser, quiet):
     is_flag=True,
     help="Suppress progress output.",
 )
-def patterns_cmd(source, output, api_key, limit, extract_only, review, auto_approve, update, quiet):
+def patterns_cmd(
+    source,
+    output,
+    api_key,
+    limit,
+    jobs,
+    concurrency,
+    batch_api,
+    extract_only,
+    review,
+    auto_approve,
+    update,
+    quiet,
+):
     """Extract patterns from your Claude Code sessions and generate a knowledge bank.
-    
+
     Analyzes your coding assistant conversations to identify:
     - Recurring instructions and preferences
     - Coding style patterns
     - Corrections (revealing implicit preferences)
-    
+
     Examples:
-    
+
       # Run full analysis
       claude-code-transcripts patterns
-      
+
       # Extract prompts only (no API calls)
       claude-code-transcripts patterns --extract-only
-      
+
       # Review patterns interactively
       claude-code-transcripts patterns --review
-      
+
       # Update with new sessions only
       claude-code-transcripts patterns --update
     """
     from .extract_prompts import collect_prompts_for_analysis, get_prompt_stats
-    from .pattern_analyzer import AnalysisResult, analyze_all_prompts
+    from .pattern_analyzer import (
+        AnalysisResult,
+        analyze_all_prompts,
+        analyze_all_prompts_batch_api,
+    )
     from .knowledge_bank import generate_knowledge_bank
     from .review_cli import review_patterns_interactive, quick_approve_all
-    
+
     # Default source folder
     if source is None:
         source = Path.home() / ".claude" / "projects"
     else:
         source = Path(source)
-    
+
     if not source.exists():
         raise click.ClickException(f"Source directory not found: {source}")
-    
+
     output = Path(output)
     state_path = output.parent / f".{output.stem}_state.json"
-    
+
     # Handle --review: load existing state and review
     if review:
         if not state_path.exists():
@@ -2428,7 +2465,7 @@ def patterns_cmd(source, output, api_key, limit, extract_only, review, auto_appr
         generate_knowledge_bank(result, output)
         click.echo(f"\n✓ Knowledge bank updated: {output}")
         return
-    
+
     # Handle --update: load state and only process new sessions
     analyzed_sessions = set()
     if update and state_path.exists():
@@ -2436,58 +2473,70 @@ def patterns_cmd(source, output, api_key, limit, extract_only, review, auto_appr
         # In a real implementation, we'd track session IDs
         # For now, we'll just append new patterns
         if not quiet:
-            click.echo(f"Loading previous analysis with {len(prev_result.patterns)} patterns...")
-    
+            click.echo(
+                f"Loading previous analysis with {len(prev_result.patterns)} patterns..."
+            )
+
     # Extract prompts
     if not quiet:
         click.echo(f"Scanning {source}...")
-        stats = get_prompt_stats(source)
-        click.echo(f"Found {stats['total_sessions']} sessions with {stats['total_prompts']} prompts")
+        stats = get_prompt_stats(source, workers=jobs)
+        click.echo(
+            f"Found {stats['total_sessions']} sessions with {stats['total_prompts']} prompts"
+        )
         click.echo(f"  Instructions: {stats['by_type'].get('instruction', 0)}")
         click.echo(f"  Corrections: {stats['by_type'].get('correction', 0)}")
         click.echo(f"  General: {stats['by_type'].get('general', 0)}")
-    
-    prompts = collect_prompts_for_analysis(source, limit=limit)
-    
+
+    prompts = collect_prompts_for_analysis(source, limit=limit, workers=jobs)
+
     if not prompts:
         click.echo("No prompts found to analyze.")
         return
-    
+
     if extract_only:
         click.echo(f"\n✓ Extracted {len(prompts)} prompts")
         click.echo("Use --review to analyze with LLM.")
         return
-    
+
     # Run LLM analysis
     if not api_key:
         raise click.ClickException(
             "Anthropic API key required. Set ANTHROPIC_API_KEY or use --api-key."
         )
-    
+
     if not quiet:
         click.echo(f"\nAnalyzing {len(prompts)} prompts with Claude...")
-    
+
     def on_progress(current, total):
         if not quiet:
             click.echo(f"  Processing batch {current}/{total}...")
-    
+
     try:
-        result = analyze_all_prompts(
-            prompts,
-            api_key=api_key,
-            progress_callback=on_progress,
-        )
+        if batch_api:
+            result = analyze_all_prompts_batch_api(
+                prompts,
+                api_key=api_key,
+                progress_callback=on_progress,
+            )
+        else:
+            result = analyze_all_prompts(
+                prompts,
+                api_key=api_key,
+                progress_callback=on_progress,
+                concurrency=concurrency,
+            )
     except ImportError as e:
         raise click.ClickException(str(e))
     except Exception as e:
         raise click.ClickException(f"Analysis failed: {e}")
-    
+
     if not quiet:
         click.echo(f"\n✓ Found {len(result.patterns)} patterns")
-    
+
     # Save state
     result.save(state_path)
-    
+
     # Review or auto-approve
     if auto_approve:
         result = quick_approve_all(result)
@@ -2495,7 +2544,7 @@ def patterns_cmd(source, output, api_key, limit, extract_only, review, auto_appr
             click.echo("Auto-approved all patterns.")
     else:
         result = review_patterns_interactive(result, state_path)
-    
+
     # Generate knowledge bank
     generate_knowledge_bank(result, output)
     click.echo(f"\n✓ Knowledge bank saved: {output}")
@@ -2503,4 +2552,3 @@ def patterns_cmd(source, output, api_key, limit, extract_only, review, auto_appr
 
 def main():
     cli()
-
@@ -1,8 +1,11 @@
 """LLM-based pattern analysis for extracted user prompts."""
 
+import asyncio
 import json
 import os
-from dataclasses import dataclass, field, asdict
+import re
+import time
+from dataclasses import dataclass, field
 from typing import Optional
 from pathlib import Path
 
@@ -11,6 +14,11 @@ try:
 except ImportError:
     anthropic = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Predefined categories for pattern organization
 PREDEFINED_CATEGORIES = {
     "coding_style": "Naming conventions, formatting, code style preferences",
@@ -65,15 +73,24 @@ Output your analysis as valid JSON with this structure:
 @dataclass
 class Pattern:
     """A discovered preference pattern."""
+
     summary: str
     examples: list[str]
     confidence: str  # high, medium, low
     category: str
     approved: Optional[bool] = None  # None = not reviewed, True/False = user decision
-    
+
     def to_dict(self) -> dict:
-        return asdict(self)
-    
+        # Built by hand rather than dataclasses.asdict, which walks the
+        # instance recursively and deep-copies every field
+        return {
+            "summary": self.summary,
+            "examples": list(self.examples),
+            "confidence": self.confidence,
+            "category": self.category,
+            "approved": self.approved,
+        }
+
     @classmethod
     def from_dict(cls, data: dict) -> "Pattern":
         return cls(**data)
@@ -82,11 +99,14 @@ class Pattern:
 @dataclass
 class AnalysisResult:
     """Result of pattern analysis."""
+
     patterns: list[Pattern] = field(default_factory=list)
-    custom_categories: dict[str, str] = field(default_factory=dict)  # name -> description
+    custom_categories: dict[str, str] = field(
+        default_factory=dict
+    )  # name -> description
     total_prompts_analyzed: int = 0
     sessions_analyzed: int = 0
-    
+
     def to_dict(self) -> dict:
         return {
             "patterns": [p.to_dict() for p in self.patterns],
@@ -94,7 +114,7 @@ class AnalysisResult:
             "total_prompts_analyzed": self.total_prompts_analyzed,
             "sessions_analyzed": self.sessions_analyzed,
         }
-    
+
     @classmethod
     def from_dict(cls, data: dict) -> "AnalysisResult":
         patterns = [Pattern.from_dict(p) for p in data.get("patterns", [])]
@@ -104,12 +124,19 @@ class AnalysisResult:
             total_prompts_analyzed=data.get("total_prompts_analyzed", 0),
             sessions_analyzed=data.get("sessions_analyzed", 0),
         )
-    
+
     def save(self, path: Path):
         """Save analysis result to JSON file."""
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, indent=2)
-    
+        if orjson is not None:
+            # orjson serialises in C and returns bytes, far cheaper than
+            # json.dump's per-token Python loop for large results
+            Path(path).write_bytes(
+                orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2)
+            )
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, indent=2)
+
     @classmethod
     def load(cls, path: Path) -> "AnalysisResult":
         """Load analysis result from JSON file."""
@@ -130,36 +157,66 @@ def get_api_key() -> str:
 
 def batch_prompts(prompts: list[dict], batch_size: int = 100) -> list[list[dict]]:
     """Split prompts into batches for efficient API usage.
-    
+
+    Each batch is a slice of the input, so the prompt dicts themselves
+    are shared, not copied - splitting costs one pointer copy per
+    prompt regardless of batch size.
+
     Args:
         prompts: List of prompt dicts
         batch_size: Max prompts per batch
-        
+
     Returns:
         List of prompt batches
     """
-    batches = []
-    for i in range(0, len(prompts), batch_size):
-        batches.append(prompts[i:i + batch_size])
-    return batches
+    return [prompts[i : i + batch_size] for i in range(0, len(prompts), batch_size)]
 
 
 def format_prompts_for_analysis(prompts: list[dict]) -> str:
     """Format prompts for LLM analysis.
-    
+
     Args:
         prompts: List of prompt dicts with text, type, project
-        
+
     Returns:
         Formatted string for LLM input
     """
-    lines = []
-    for i, p in enumerate(prompts, 1):
-        prompt_type = p.get("type", "general")
-        project = p.get("project", "unknown")
-        text = p.get("text", "")
-        lines.append(f"[{i}] ({prompt_type}, {project}) {text}")
-    return "\n".join(lines)
+    return "\n".join(
+        [
+            f"[{i}] ({p.get('type', 'general')}, {p.get('project', 'unknown')}) {p.get('text', '')}"
+            for i, p in enumerate(prompts, 1)
+        ]
+    )
+
+
+def _build_analysis_message(prompts: list[dict]) -> str:
+    """Build the user message for a batch analysis request."""
+    formatted_prompts = format_prompts_for_analysis(prompts)
+
+    return f"""Analyze these {len(prompts)} user prompts from coding assistant sessions and identify recurring patterns:
+
+{formatted_prompts}
+
+Remember to output valid JSON with patterns and any custom categories."""
+
+
+def _parse_analysis_response(text: str) -> dict:
+    """Parse the JSON analysis out of a Claude response."""
+    try:
+        # Handle case where response is wrapped in a markdown code
+        # block; partition scans the text once and keeps only the piece
+        # we need, where split built a list of every segment just to
+        # index [0] and [1]
+        _, fence, rest = text.partition("```json")
+        if not fence:
+            _, fence, rest = text.partition("```")
+        if fence:
+            text = rest.partition("```")[0]
+
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        # Return raw text if JSON parsing fails
+        return {"raw_response": text, "parse_error": str(e)}
 
 
 def analyze_prompts_batch(
@@ -168,12 +225,12 @@ def analyze_prompts_batch(
     model: str = "claude-sonnet-4-20250514",
 ) -> dict:
     """Analyze a batch of prompts using Claude API.
-    
+
     Args:
         prompts: List of prompt dicts
         api_key: Anthropic API key
         model: Model to use for analysis
-        
+
     Returns:
         Raw JSON response from Claude
     """
@@ -182,57 +239,118 @@ def analyze_prompts_batch(
             "anthropic package not installed. "
             "Please install it with: pip install anthropic"
         )
-    
-    client = anthropic.Anthropic(api_key=api_key)
-    
-    formatted_prompts = format_prompts_for_analysis(prompts)
-    
-    user_message = f"""Analyze these {len(prompts)} user prompts from coding assistant sessions and identify recurring patterns:
-
-{formatted_prompts}
 
-Remember to output valid JSON with patterns and any custom categories."""
+    client = anthropic.Anthropic(api_key=api_key)
 
     response = client.messages.create(
         model=model,
         max_tokens=4096,
         system=DISCOVERY_SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": user_message}],
+        messages=[{"role": "user", "content": _build_analysis_message(prompts)}],
     )
-    
-    # Extract JSON from response
-    text = response.content[0].text
-    
-    # Try to parse JSON from the response
-    try:
-        # Handle case where response is wrapped in markdown code block
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0]
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0]
-        
-        return json.loads(text)
-    except json.JSONDecodeError as e:
-        # Return raw text if JSON parsing fails
-        return {"raw_response": text, "parse_error": str(e)}
+
+    return _parse_analysis_response(response.content[0].text)
+
+
+async def _analyze_batches_async(
+    batches: list[list[dict]],
+    api_key: str,
+    model: str,
+    concurrency: int,
+    progress_callback=None,
+) -> list[dict]:
+    """Run analyze requests for all batches concurrently.
+
+    Results are returned in batch order; progress_callback is invoked
+    as each request completes.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results: list[dict] = [{} for _ in batches]
+    completed = 0
+
+    async with anthropic.AsyncAnthropic(api_key=api_key) as client:
+
+        async def analyze_one(index: int, batch: list[dict]):
+            nonlocal completed
+            async with semaphore:
+                response = await client.messages.create(
+                    model=model,
+                    max_tokens=4096,
+                    system=DISCOVERY_SYSTEM_PROMPT,
+                    messages=[
+                        {"role": "user", "content": _build_analysis_message(batch)}
+                    ],
+                )
+            results[index] = _parse_analysis_response(response.content[0].text)
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, len(batches))
+
+        await asyncio.gather(
+            *(analyze_one(i, batch) for i, batch in enumerate(batches))
+        )
+
+    return results
+
+
+# Two summaries sharing at least this fraction of their words (Jaccard
+# similarity) are considered the same pattern
+_DEDUP_THRESHOLD = 0.8
+
+_CONFIDENCE_RANK = {"high": 2, "medium": 1, "low": 0}
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def _dedup_patterns(patterns: list[Pattern]) -> list[Pattern]:
+    """Collapse near-duplicate patterns discovered across batches.
+
+    Compares lowercased word sets of the summaries; when two patterns
+    exceed the Jaccard threshold the first occurrence wins, absorbing
+    the duplicate's examples and the higher of the two confidences.
+    """
+    kept: list[Pattern] = []
+    kept_words: list[frozenset] = []
+
+    for pattern in patterns:
+        words = frozenset(_WORD_RE.findall(pattern.summary.lower()))
+
+        for existing, existing_words in zip(kept, kept_words):
+            if not words or not existing_words:
+                continue
+            similarity = len(words & existing_words) / len(words | existing_words)
+            if similarity >= _DEDUP_THRESHOLD:
+                for example in pattern.examples:
+                    if example not in existing.examples:
+                        existing.examples.append(example)
+                if _CONFIDENCE_RANK.get(pattern.confidence, 0) > _CONFIDENCE_RANK.get(
+                    existing.confidence, 0
+                ):
+                    existing.confidence = pattern.confidence
+                break
+        else:
+            kept.append(pattern)
+            kept_words.append(words)
+
+    return kept
 
 
 def merge_pattern_results(results: list[dict]) -> AnalysisResult:
     """Merge multiple batch analysis results into a single result.
-    
+
     Args:
         results: List of raw JSON responses from analyze_prompts_batch
-        
+
     Returns:
         Merged AnalysisResult
     """
     all_patterns = []
     all_custom_categories = {}
-    
+
     for result in results:
         if "parse_error" in result:
             continue
-            
+
         # Extract patterns
         for p in result.get("patterns", []):
             pattern = Pattern(
@@ -242,7 +360,7 @@ def merge_pattern_results(results: list[dict]) -> AnalysisResult:
                 category=p.get("category", "general"),
             )
             all_patterns.append(pattern)
-        
+
         # Extract custom categories
         for cat in result.get("custom_categories", []):
             if isinstance(cat, dict):
@@ -250,10 +368,10 @@ def merge_pattern_results(results: list[dict]) -> AnalysisResult:
                 desc = cat.get("description", "")
                 if name:
                     all_custom_categories[name] = desc
-    
+
     # Deduplicate similar patterns (by summary similarity)
-    # For now, just return all patterns - deduplication can be added later
-    
+    all_patterns = _dedup_patterns(all_patterns)
+
     return AnalysisResult(
         patterns=all_patterns,
         custom_categories=all_custom_categories,
@@ -266,34 +384,130 @@ def analyze_all_prompts(
     batch_size: int = 100,
     model: str = "claude-sonnet-4-20250514",
     progress_callback=None,
+    concurrency: int = 1,
 ) -> AnalysisResult:
     """Analyze all prompts and extract patterns.
-    
+
     Args:
         prompts: List of prompt dicts from collect_prompts_for_analysis
         api_key: Anthropic API key (uses env if not provided)
         batch_size: Prompts per API call
         model: Claude model to use
         progress_callback: Optional callback(current_batch, total_batches)
-        
+        concurrency: Max API calls in flight (1 = sequential)
+
+    Returns:
+        AnalysisResult with discovered patterns
+    """
+    if not api_key:
+        api_key = get_api_key()
+
+    batches = batch_prompts(prompts, batch_size)
+
+    if concurrency > 1:
+        if anthropic is None:
+            raise ImportError(
+                "anthropic package not installed. "
+                "Please install it with: pip install anthropic"
+            )
+        results = asyncio.run(
+            _analyze_batches_async(
+                batches, api_key, model, concurrency, progress_callback
+            )
+        )
+    else:
+        results = []
+        for i, batch in enumerate(batches):
+            if progress_callback:
+                progress_callback(i + 1, len(batches))
+
+            result = analyze_prompts_batch(batch, api_key, model)
+            results.append(result)
+
+    merged = merge_pattern_results(results)
+    merged.total_prompts_analyzed = len(prompts)
+    merged.sessions_analyzed = len(set(p.get("session_id", "") for p in prompts))
+
+    return merged
+
+
+def analyze_all_prompts_batch_api(
+    prompts: list[dict],
+    api_key: Optional[str] = None,
+    batch_size: int = 100,
+    model: str = "claude-sonnet-4-20250514",
+    progress_callback=None,
+    poll_interval: float = 30.0,
+) -> AnalysisResult:
+    """Analyze all prompts through the Message Batches API.
+
+    Submits every batch as one Message Batch job and polls until it
+    finishes. Slower to start than analyze_all_prompts but runs
+    server-side at half the per-token cost, so it is the better choice
+    for large archives where latency doesn't matter.
+
+    Args:
+        prompts: List of prompt dicts from collect_prompts_for_analysis
+        api_key: Anthropic API key (uses env if not provided)
+        batch_size: Prompts per request within the batch job
+        model: Claude model to use
+        progress_callback: Optional callback(completed_requests, total_requests)
+        poll_interval: Seconds between status polls
+
     Returns:
         AnalysisResult with discovered patterns
     """
+    if anthropic is None:
+        raise ImportError(
+            "anthropic package not installed. "
+            "Please install it with: pip install anthropic"
+        )
+
     if not api_key:
         api_key = get_api_key()
-    
+
+    client = anthropic.Anthropic(api_key=api_key)
+
     batches = batch_prompts(prompts, batch_size)
-    results = []
-    
-    for i, batch in enumerate(batches):
+    requests = [
+        {
+            "custom_id": f"batch-{i}",
+            "params": {
+                "model": model,
+                "max_tokens": 4096,
+                "system": DISCOVERY_SYSTEM_PROMPT,
+                "messages": [
+                    {"role": "user", "content": _build_analysis_message(batch)}
+                ],
+            },
+        }
+        for i, batch in enumerate(batches)
+    ]
+
+    job = client.messages.batches.create(requests=requests)
+
+    while job.processing_status == "in_progress":
+        time.sleep(poll_interval)
+        job = client.messages.batches.retrieve(job.id)
         if progress_callback:
-            progress_callback(i + 1, len(batches))
-        
-        result = analyze_prompts_batch(batch, api_key, model)
-        results.append(result)
-    
+            counts = job.request_counts
+            done = counts.succeeded + counts.errored + counts.expired + counts.canceled
+            progress_callback(done, len(requests))
+
+    # Results stream back in arbitrary order; custom_id restores batch
+    # order, and failed requests are recorded so merge skips them
+    results: list[dict] = [{"parse_error": "no result returned"} for _ in requests]
+    for entry in client.messages.batches.results(job.id):
+        index = int(entry.custom_id.rsplit("-", 1)[1])
+        if entry.result.type == "succeeded":
+            results[index] = _parse_analysis_response(
+                entry.result.message.content[0].text
+            )
+        else:
+            results[index] = {"parse_error": f"request {entry.result.type}"}
+
     merged = merge_pattern_results(results)
     merged.total_prompts_analyzed = len(prompts)
     merged.sessions_analyzed = len(set(p.get("session_id", "") for p in prompts))
-    
+
     return merged
@@ -0,0 +1,299 @@
+"""Tests for prompt extraction and classification."""
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from claude_code_transcripts import cli
+from claude_code_transcripts.extract_prompts import (
+    classify_prompt,
+    collect_prompts_for_analysis,
+    extract_all_prompts,
+    extract_user_prompts,
+    get_prompt_stats,
+)
+
+
+@pytest.fixture
+def projects_dir(tmp_path):
+    """A minimal ~/.claude/projects style folder with two projects."""
+    project_a = tmp_path / "-home-user-projects-project-a"
+    project_a.mkdir()
+    (project_a / "abc123.jsonl").write_text(
+        '{"type": "user", "timestamp": "2025-01-01T10:00:00.000Z", "message": {"role": "user", "content": "Add a login page"}}\n'
+    )
+    (project_a / "def456.jsonl").write_text(
+        '{"type": "user", "timestamp": "2025-01-02T10:00:00.000Z", "message": {"role": "user", "content": "always use pytest fixtures"}}\n'
+    )
+
+    project_b = tmp_path / "-home-user-projects-project-b"
+    project_b.mkdir()
+    (project_b / "ghi789.jsonl").write_text(
+        '{"type": "user", "timestamp": "2025-01-03T10:00:00.000Z", "message": {"role": "user", "content": "no, rename that module"}}\n'
+    )
+
+    return tmp_path
+
+
+class TestClassifyPrompt:
+    """Tests for classify_prompt function."""
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "No, use the other approach",
+            "actually, let's keep the old name",
+            "Wait, that file is wrong",
+            "sorry, I meant the config file",
+            "change that to a dataclass",
+            "undo the last change",
+            "Revert everything in that commit",
+            "go back to the previous version",
+        ],
+    )
+    def test_detects_corrections(self, text):
+        """Correction phrasings are classified as corrections."""
+        assert classify_prompt(text) == "correction"
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Always run the tests before committing",
+            "never use tabs in this project",
+            "Make sure to update the README",
+            "don't forget the changelog entry",
+            "I prefer short functions",
+            "remember to run the formatter",
+            "tests should be fast",
+        ],
+    )
+    def test_detects_instructions(self, text):
+        """Instruction phrasings are classified as instructions."""
+        assert classify_prompt(text) == "instruction"
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Add a CLI flag for verbose output",
+            "What does this function do?",
+            "Please fix the failing test",
+        ],
+    )
+    def test_defaults_to_general(self, text):
+        """Ordinary prompts fall through to general."""
+        assert classify_prompt(text) == "general"
+
+    def test_empty_text_is_general(self):
+        """Empty text is classified as general."""
+        assert classify_prompt("") == "general"
+
+    def test_correction_takes_priority_over_instruction(self):
+        """A prompt matching both classes is reported as a correction."""
+        assert classify_prompt("no, always use double quotes") == "correction"
+
+
+class TestRe2SetPath:
+    """Tests for the optional google-re2 set-matching path."""
+
+    def test_re2_set_is_built_and_classifies(self):
+        """With re2 installed the set path must be active, not silently
+        falling back to the stdlib regexes."""
+        pytest.importorskip("re2")
+        from claude_code_transcripts import extract_prompts
+
+        assert extract_prompts._RE2_SET is not None
+        assert classify_prompt("no, use the other file") == "correction"
+        assert classify_prompt("always run black first") == "instruction"
+        assert classify_prompt("no, always use double quotes") == "correction"
+        assert classify_prompt("add a new page template") == "general"
+        assert classify_prompt("") == "general"
+
+
+class TestExtractUserPrompts:
+    """Tests for extract_user_prompts function."""
+
+    def test_extracts_prompts_from_jsonl(self, tmp_path):
+        """User prompts are extracted from a JSONL session."""
+        session = tmp_path / "session.jsonl"
+        session.write_text(
+            '{"type": "user", "timestamp": "2025-01-01T10:00:00.000Z", "message": {"role": "user", "content": "Add a new CLI command"}}\n'
+            '{"type": "assistant", "timestamp": "2025-01-01T10:00:05.000Z", "message": {"role": "assistant", "content": [{"type": "text", "text": "Done!"}]}}\n'
+            '{"type": "user", "timestamp": "2025-01-01T10:01:00.000Z", "message": {"role": "user", "content": "no, put it in the other module"}}\n'
+        )
+
+        prompts = extract_user_prompts(session)
+
+        assert len(prompts) == 2
+        assert prompts[0]["text"] == "Add a new CLI command"
+        assert prompts[0]["type"] == "general"
+        assert prompts[0]["timestamp"] == "2025-01-01T10:00:00.000Z"
+        assert prompts[1]["type"] == "correction"
+
+    def test_skips_tool_results_and_short_prompts(self, tmp_path):
+        """Tool-result entries and tiny confirmations are not prompts."""
+        session = tmp_path / "session.jsonl"
+        session.write_text(
+            '{"type": "user", "timestamp": "", "message": {"role": "user", "content": [{"type": "tool_result", "tool_use_id": "t1", "content": "ok"}]}}\n'
+            '{"type": "user", "timestamp": "", "message": {"role": "user", "content": "yes"}}\n'
+            '{"type": "user", "timestamp": "", "message": {"role": "user", "content": "<system>ignore this</system>"}}\n'
+        )
+
+        assert extract_user_prompts(session) == []
+
+    def test_extracts_prompts_from_json(self, tmp_path):
+        """User prompts are extracted from a plain JSON session."""
+        session = tmp_path / "session.json"
+        session.write_text(
+            json.dumps(
+                {
+                    "loglines": [
+                        {
+                            "type": "user",
+                            "timestamp": "2025-01-01T10:00:00.000Z",
+                            "message": {"role": "user", "content": "Fix the bug"},
+                        }
+                    ]
+                }
+            )
+        )
+
+        prompts = extract_user_prompts(session)
+
+        assert len(prompts) == 1
+        assert prompts[0]["text"] == "Fix the bug"
+
+    def test_caches_unchanged_sessions(self, tmp_path):
+        """A second extraction of an unchanged file is served from cache."""
+        session = tmp_path / "session.jsonl"
+        session.write_text(
+            '{"type": "user", "timestamp": "2025-01-01T10:00:00.000Z", "message": {"role": "user", "content": "Add a login page"}}\n'
+        )
+
+        first = extract_user_prompts(session)
+        second = extract_user_prompts(session)
+
+        # Fresh list each call, but the prompt dicts are shared
+        assert second is not first
+        assert second[0] is first[0]
+
+    def test_reextracts_when_file_changes(self, tmp_path):
+        """A changed mtime invalidates the cached prompts."""
+        import os
+
+        session = tmp_path / "session.jsonl"
+        session.write_text(
+            '{"type": "user", "timestamp": "2025-01-01T10:00:00.000Z", "message": {"role": "user", "content": "Add a login page"}}\n'
+        )
+
+        extract_user_prompts(session)
+
+        session.write_text(
+            '{"type": "user", "timestamp": "2025-01-01T10:00:00.000Z", "message": {"role": "user", "content": "Remove the login page"}}\n'
+        )
+        os.utime(session, ns=(0, 0))
+
+        prompts = extract_user_prompts(session)
+
+        assert prompts[0]["text"] == "Remove the login page"
+
+    def test_ignores_malformed_jsonl_lines(self, tmp_path):
+        """Broken lines don't abort extraction of the rest of the session."""
+        session = tmp_path / "session.jsonl"
+        session.write_text(
+            '{"type": "user", broken json "user"\n'
+            '{"type": "user", "timestamp": "", "message": {"role": "user", "content": "Still works fine"}}\n'
+        )
+
+        prompts = extract_user_prompts(session)
+
+        assert len(prompts) == 1
+        assert prompts[0]["text"] == "Still works fine"
+
+
+class TestExtractAllPrompts:
+    """Tests for extract_all_prompts function."""
+
+    def test_extracts_sessions_across_projects(self, projects_dir):
+        """Sessions from every project are yielded with their prompts."""
+        sessions = list(extract_all_prompts(projects_dir))
+
+        assert len(sessions) == 3
+        projects = {s["project"] for s in sessions}
+        assert projects == {"project-a", "project-b"}
+
+    def test_limit_caps_session_count(self, projects_dir):
+        """The limit argument caps the number of yielded sessions."""
+        sessions = list(extract_all_prompts(projects_dir, limit=2))
+        assert len(sessions) == 2
+
+    def test_parallel_matches_serial(self, projects_dir):
+        """Multi-process extraction yields the same sessions as serial."""
+        serial = list(extract_all_prompts(projects_dir))
+        parallel = list(extract_all_prompts(projects_dir, workers=2))
+        assert parallel == serial
+
+
+class TestGetPromptStats:
+    """Tests for get_prompt_stats function."""
+
+    def test_counts_sessions_prompts_and_types(self, projects_dir):
+        """Stats aggregate session, prompt, and per-type counts."""
+        stats = get_prompt_stats(projects_dir)
+
+        assert stats["total_sessions"] == 3
+        assert stats["total_prompts"] == 3
+        assert stats["by_type"] == {
+            "instruction": 1,
+            "correction": 1,
+            "general": 1,
+        }
+        assert sorted(stats["projects"]) == ["project-a", "project-b"]
+
+    def test_workers_give_identical_stats(self, projects_dir):
+        """Stats computed with worker processes match the serial run."""
+        assert get_prompt_stats(projects_dir, workers=2) == get_prompt_stats(
+            projects_dir
+        )
+
+
+class TestCollectPromptsForAnalysis:
+    """Tests for collect_prompts_for_analysis function."""
+
+    def test_collects_prompts_with_project_and_session(self, projects_dir):
+        """Collected prompts carry text, type, project, and session id."""
+        prompts = collect_prompts_for_analysis(projects_dir)
+
+        assert len(prompts) == 3
+        for prompt in prompts:
+            assert set(prompt) == {"text", "type", "project", "session_id"}
+
+    def test_workers_give_identical_prompts(self, projects_dir):
+        """Collection with worker processes matches the serial run."""
+        serial = collect_prompts_for_analysis(projects_dir)
+        parallel = collect_prompts_for_analysis(projects_dir, workers=2)
+        assert parallel == serial
+
+
+class TestPatternsCommandJobs:
+    """Tests for the patterns command --jobs option."""
+
+    def test_extract_only_with_jobs(self, projects_dir, tmp_path):
+        """--jobs is accepted and extraction still works."""
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            [
+                "patterns",
+                "--source",
+                str(projects_dir),
+                "--output",
+                str(tmp_path / "patterns.md"),
+                "--extract-only",
+                "--jobs",
+                "2",
+            ],
+        )
+
+        assert result.exit_code == 0
+        assert "Extracted 3 prompts" in result.output
@@ -889,7 +889,9 @@ class TestVersionOption:
         runner = CliRunner()
         result = runner.invoke(cli, ["--version"])
 
-        expected_version = importlib.metadata.version("claude-code-transcripts-extended")
+        expected_version = importlib.metadata.version(
+            "claude-code-transcripts-extended"
+        )
         assert result.exit_code == 0
         assert expected_version in result.output
 
@@ -902,7 +904,9 @@ class TestVersionOption:
         runner = CliRunner()
         result = runner.invoke(cli, ["-v"])
 
-        expected_version = importlib.metadata.version("claude-code-transcripts-extended")
+        expected_version = importlib.metadata.version(
+            "claude-code-transcripts-extended"
+        )
         assert result.exit_code == 0
         assert expected_version in result.output
 
@@ -0,0 +1,76 @@
+"""Tests for Markdown knowledge bank generation."""
+
+from claude_code_transcripts.knowledge_bank import generate_knowledge_bank
+from claude_code_transcripts.pattern_analyzer import AnalysisResult, Pattern
+
+
+class TestGenerateKnowledgeBank:
+    """Tests for generate_knowledge_bank function."""
+
+    def test_empty_result_renders_placeholder(self):
+        """With no patterns a placeholder message is rendered."""
+        content = generate_knowledge_bank(AnalysisResult())
+        assert "No patterns discovered yet" in content
+
+    def test_patterns_sorted_by_confidence_within_category(self):
+        """High-confidence patterns come before lower ones in a section."""
+        result = AnalysisResult(
+            patterns=[
+                Pattern(
+                    summary="Low confidence testing habit",
+                    examples=[],
+                    confidence="low",
+                    category="testing",
+                ),
+                Pattern(
+                    summary="High confidence testing habit",
+                    examples=[],
+                    confidence="high",
+                    category="testing",
+                ),
+            ]
+        )
+
+        content = generate_knowledge_bank(result)
+
+        assert content.index("High confidence testing habit") < content.index(
+            "Low confidence testing habit"
+        )
+
+    def test_rejected_patterns_are_excluded(self):
+        """Patterns the user rejected during review don't appear."""
+        result = AnalysisResult(
+            patterns=[
+                Pattern(
+                    summary="Rejected pattern",
+                    examples=[],
+                    confidence="high",
+                    category="testing",
+                    approved=False,
+                ),
+                Pattern(
+                    summary="Approved pattern",
+                    examples=[],
+                    confidence="high",
+                    category="testing",
+                    approved=True,
+                ),
+            ]
+        )
+
+        content = generate_knowledge_bank(result)
+
+        assert "Approved pattern" in content
+        assert "Rejected pattern" not in content
+
+    def test_writes_output_file(self, tmp_path):
+        """The generated Markdown is written when a path is given."""
+        output = tmp_path / "PATTERNS.md"
+        content = generate_knowledge_bank(AnalysisResult(), output_path=output)
+        assert output.read_text(encoding="utf-8") == content
+
+    def test_creates_missing_parent_directories(self, tmp_path):
+        """Writing creates intermediate directories, even with no patterns."""
+        output = tmp_path / "bank" / "nested" / "PATTERNS.md"
+        generate_knowledge_bank(AnalysisResult(), output_path=output)
+        assert output.exists()
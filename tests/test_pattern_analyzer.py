@@ -0,0 +1,417 @@
+"""Tests for LLM-based pattern analysis helpers."""
+
+import json
+from types import SimpleNamespace
+
+from claude_code_transcripts import pattern_analyzer
+
+from claude_code_transcripts.pattern_analyzer import (
+    AnalysisResult,
+    Pattern,
+    _parse_analysis_response,
+    batch_prompts,
+    format_prompts_for_analysis,
+    merge_pattern_results,
+)
+
+
+def _analysis_response_for(messages):
+    """Echo the first prompt of the request back as a single pattern."""
+    content = messages[0]["content"]
+    line = next(l for l in content.splitlines() if l.startswith("[1] "))
+    text = line.split(") ", 1)[1]
+    payload = json.dumps(
+        {
+            "patterns": [
+                {
+                    "summary": text,
+                    "examples": [text],
+                    "confidence": "low",
+                    "category": "general",
+                }
+            ]
+        }
+    )
+    return SimpleNamespace(content=[SimpleNamespace(text=payload)])
+
+
+class StubAsyncAnthropic:
+    """Stand-in for anthropic.AsyncAnthropic recording usage."""
+
+    closed = False
+
+    def __init__(self, api_key=None):
+        type(self).closed = False
+        self.messages = SimpleNamespace(create=self._create)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        type(self).closed = True
+        return False
+
+    async def _create(self, model, max_tokens, system, messages):
+        return _analysis_response_for(messages)
+
+
+class TestAnalyzeAllPromptsConcurrent:
+    """Tests for the concurrent path of analyze_all_prompts."""
+
+    def test_concurrent_analysis_preserves_batch_order(self, monkeypatch):
+        """Results stay in batch order and the async client is closed."""
+        monkeypatch.setattr(
+            pattern_analyzer.anthropic, "AsyncAnthropic", StubAsyncAnthropic
+        )
+
+        texts = ["alpha bravo", "charlie delta", "echo foxtrot"]
+        prompts = [{"text": t, "session_id": str(i)} for i, t in enumerate(texts)]
+        progress = []
+
+        result = pattern_analyzer.analyze_all_prompts(
+            prompts,
+            api_key="test-key",
+            batch_size=1,
+            concurrency=2,
+            progress_callback=lambda current, total: progress.append((current, total)),
+        )
+
+        assert [p.summary for p in result.patterns] == texts
+        assert result.total_prompts_analyzed == 3
+        assert result.sessions_analyzed == 3
+        # One progress tick per batch, ending at 3/3
+        assert len(progress) == 3
+        assert progress[-1] == (3, 3)
+        assert StubAsyncAnthropic.closed
+
+
+class StubBatchAnthropic:
+    """Stand-in for anthropic.Anthropic covering the batches API."""
+
+    polls = 0
+    failing_ids: set = set()
+
+    def __init__(self, api_key=None):
+        type(self).polls = 0
+        self._requests = []
+        self.messages = SimpleNamespace(
+            batches=SimpleNamespace(
+                create=self._create,
+                retrieve=self._retrieve,
+                results=self._results,
+            )
+        )
+
+    def _create(self, requests):
+        self._requests = list(requests)
+        return SimpleNamespace(id="batch_1", processing_status="in_progress")
+
+    def _retrieve(self, batch_id):
+        type(self).polls += 1
+        counts = SimpleNamespace(
+            succeeded=len(self._requests), errored=0, expired=0, canceled=0
+        )
+        return SimpleNamespace(
+            id=batch_id, processing_status="ended", request_counts=counts
+        )
+
+    def _results(self, batch_id):
+        # Yielded in reverse to prove reassembly relies on custom_id
+        for request in reversed(self._requests):
+            if request["custom_id"] in self.failing_ids:
+                result = SimpleNamespace(type="errored")
+            else:
+                result = SimpleNamespace(
+                    type="succeeded",
+                    message=_analysis_response_for(request["params"]["messages"]),
+                )
+            yield SimpleNamespace(custom_id=request["custom_id"], result=result)
+
+
+class TestAnalyzeAllPromptsBatchApi:
+    """Tests for analyze_all_prompts_batch_api function."""
+
+    def test_reassembles_results_by_custom_id(self, monkeypatch):
+        """Out-of-order batch results come back in batch order."""
+        monkeypatch.setattr(pattern_analyzer.anthropic, "Anthropic", StubBatchAnthropic)
+        monkeypatch.setattr(StubBatchAnthropic, "failing_ids", set())
+
+        texts = ["alpha bravo", "charlie delta", "echo foxtrot"]
+        prompts = [{"text": t, "session_id": str(i)} for i, t in enumerate(texts)]
+        progress = []
+
+        result = pattern_analyzer.analyze_all_prompts_batch_api(
+            prompts,
+            api_key="test-key",
+            batch_size=1,
+            poll_interval=0,
+            progress_callback=lambda current, total: progress.append((current, total)),
+        )
+
+        assert [p.summary for p in result.patterns] == texts
+        assert result.total_prompts_analyzed == 3
+        assert result.sessions_analyzed == 3
+        # The poll loop exits once processing_status leaves "in_progress"
+        assert StubBatchAnthropic.polls == 1
+        assert progress == [(3, 3)]
+
+    def test_failed_requests_are_skipped(self, monkeypatch):
+        """An errored request drops its batch without losing the others."""
+        monkeypatch.setattr(pattern_analyzer.anthropic, "Anthropic", StubBatchAnthropic)
+        monkeypatch.setattr(StubBatchAnthropic, "failing_ids", {"batch-1"})
+
+        texts = ["alpha bravo", "charlie delta", "echo foxtrot"]
+        prompts = [{"text": t, "session_id": str(i)} for i, t in enumerate(texts)]
+
+        result = pattern_analyzer.analyze_all_prompts_batch_api(
+            prompts,
+            api_key="test-key",
+            batch_size=1,
+            poll_interval=0,
+        )
+
+        assert [p.summary for p in result.patterns] == [
+            "alpha bravo",
+            "echo foxtrot",
+        ]
+
+
+class TestParseAnalysisResponse:
+    """Tests for _parse_analysis_response function."""
+
+    def test_parses_bare_json(self):
+        """A plain JSON response parses directly."""
+        assert _parse_analysis_response('{"patterns": []}') == {"patterns": []}
+
+    def test_strips_json_code_fence(self):
+        """JSON wrapped in a ```json fence is unwrapped before parsing."""
+        text = 'Here you go:\n```json\n{"patterns": []}\n```\nDone.'
+        assert _parse_analysis_response(text) == {"patterns": []}
+
+    def test_strips_anonymous_code_fence(self):
+        """JSON wrapped in a bare ``` fence is unwrapped too."""
+        text = '```\n{"patterns": []}\n```'
+        assert _parse_analysis_response(text) == {"patterns": []}
+
+    def test_unparseable_response_returns_raw_text(self):
+        """Invalid JSON comes back as raw_response with a parse_error."""
+        result = _parse_analysis_response("not json at all")
+        assert result["raw_response"] == "not json at all"
+        assert "parse_error" in result
+
+
+class TestMergePatternResults:
+    """Tests for merge_pattern_results function."""
+
+    def test_merges_patterns_and_categories(self):
+        """Patterns and custom categories from all batches are collected."""
+        results = [
+            {
+                "patterns": [
+                    {
+                        "summary": "Always writes tests first",
+                        "examples": ["write a failing test first"],
+                        "confidence": "high",
+                        "category": "testing",
+                    }
+                ],
+                "custom_categories": [{"name": "cli", "description": "CLI style"}],
+            },
+            {
+                "patterns": [
+                    {
+                        "summary": "Prefers small commits",
+                        "examples": ["commit early and often"],
+                        "confidence": "medium",
+                        "category": "workflow",
+                    }
+                ]
+            },
+        ]
+
+        merged = merge_pattern_results(results)
+
+        assert len(merged.patterns) == 2
+        assert merged.custom_categories == {"cli": "CLI style"}
+
+    def test_skips_failed_batches(self):
+        """Batches that failed to parse contribute nothing."""
+        merged = merge_pattern_results([{"raw_response": "x", "parse_error": "bad"}])
+        assert merged.patterns == []
+
+    def test_deduplicates_near_identical_summaries(self):
+        """Near-duplicate patterns collapse into one with merged examples."""
+        results = [
+            {
+                "patterns": [
+                    {
+                        "summary": "Always runs the test suite before committing",
+                        "examples": ["run the tests first"],
+                        "confidence": "medium",
+                        "category": "testing",
+                    }
+                ]
+            },
+            {
+                "patterns": [
+                    {
+                        "summary": "Always runs the test suite before committing changes",
+                        "examples": ["make sure you run pytest"],
+                        "confidence": "high",
+                        "category": "testing",
+                    }
+                ]
+            },
+        ]
+
+        merged = merge_pattern_results(results)
+
+        assert len(merged.patterns) == 1
+        pattern = merged.patterns[0]
+        assert pattern.examples == ["run the tests first", "make sure you run pytest"]
+        # The duplicate's higher confidence wins
+        assert pattern.confidence == "high"
+
+    def test_keeps_distinct_patterns_apart(self):
+        """Unrelated summaries are not merged."""
+        results = [
+            {
+                "patterns": [
+                    {
+                        "summary": "Always runs the test suite before committing",
+                        "examples": [],
+                        "confidence": "high",
+                        "category": "testing",
+                    },
+                    {
+                        "summary": "Prefers dark mode in generated HTML",
+                        "examples": [],
+                        "confidence": "low",
+                        "category": "ui_ux",
+                    },
+                ]
+            }
+        ]
+
+        assert len(merge_pattern_results(results).patterns) == 2
+
+
+class TestFormatPromptsForAnalysis:
+    """Tests for format_prompts_for_analysis function."""
+
+    def test_formats_numbered_lines(self):
+        """Each prompt becomes a numbered line with type and project."""
+        prompts = [
+            {"text": "Fix the bug", "type": "general", "project": "webapp"},
+            {"text": "always add tests", "type": "instruction", "project": "api"},
+        ]
+
+        formatted = format_prompts_for_analysis(prompts)
+
+        assert formatted == (
+            "[1] (general, webapp) Fix the bug\n"
+            "[2] (instruction, api) always add tests"
+        )
+
+    def test_missing_fields_get_defaults(self):
+        """Prompts without type or project fall back to defaults."""
+        assert (
+            format_prompts_for_analysis([{"text": "hi"}]) == "[1] (general, unknown) hi"
+        )
+
+
+class TestBatchPrompts:
+    """Tests for batch_prompts function."""
+
+    def test_splits_into_batches_of_requested_size(self):
+        """Prompts are split into batch_size chunks plus a remainder."""
+        prompts = [{"text": str(i)} for i in range(7)]
+
+        batches = batch_prompts(prompts, batch_size=3)
+
+        assert [len(b) for b in batches] == [3, 3, 1]
+        assert [p["text"] for b in batches for p in b] == [str(i) for i in range(7)]
+
+    def test_batches_share_prompt_dicts(self):
+        """Batching shares the underlying prompt dicts rather than copying."""
+        prompts = [{"text": "a"}, {"text": "b"}]
+        batches = batch_prompts(prompts, batch_size=1)
+        assert batches[0][0] is prompts[0]
+        assert batches[1][0] is prompts[1]
+
+    def test_empty_input_gives_no_batches(self):
+        """No prompts means no batches."""
+        assert batch_prompts([]) == []
+
+
+class TestPattern:
+    """Tests for Pattern serialization."""
+
+    def test_to_dict_round_trips(self):
+        """to_dict output reconstructs an equal Pattern via from_dict."""
+        pattern = Pattern(
+            summary="Prefers click for CLIs",
+            examples=["use click here", "make it a click group"],
+            confidence="medium",
+            category="tools",
+            approved=True,
+        )
+
+        data = pattern.to_dict()
+
+        assert data == {
+            "summary": "Prefers click for CLIs",
+            "examples": ["use click here", "make it a click group"],
+            "confidence": "medium",
+            "category": "tools",
+            "approved": True,
+        }
+        assert Pattern.from_dict(data) == pattern
+
+    def test_to_dict_copies_examples(self):
+        """Mutating the serialized examples doesn't touch the Pattern."""
+        pattern = Pattern(
+            summary="s", examples=["one"], confidence="low", category="general"
+        )
+
+        pattern.to_dict()["examples"].append("two")
+
+        assert pattern.examples == ["one"]
+
+
+class TestAnalysisResult:
+    """Tests for AnalysisResult serialization."""
+
+    def _sample_result(self):
+        return AnalysisResult(
+            patterns=[
+                Pattern(
+                    summary="Always uses pytest fixtures",
+                    examples=["always use pytest fixtures"],
+                    confidence="high",
+                    category="testing",
+                ),
+            ],
+            custom_categories={"cli": "Command-line interface conventions"},
+            total_prompts_analyzed=10,
+            sessions_analyzed=3,
+        )
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        """A saved result loads back with identical contents."""
+        result = self._sample_result()
+        path = tmp_path / "analysis.json"
+
+        result.save(path)
+        loaded = AnalysisResult.load(path)
+
+        assert loaded.to_dict() == result.to_dict()
+
+    def test_save_writes_indented_json(self, tmp_path):
+        """The saved file is valid, human-readable JSON."""
+        path = tmp_path / "analysis.json"
+        self._sample_result().save(path)
+
+        text = path.read_text(encoding="utf-8")
+        assert "\n" in text
+        assert json.loads(text)["total_prompts_analyzed"] == 10